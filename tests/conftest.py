@@ -0,0 +1,98 @@
+import os
+
+import matplotlib
+import numpy as np
+import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+matplotlib.use('Agg')  # Use headless backend for all test modules
+matplotlib.interactive(False)
+# Tests only inspect artist attributes, so skip layout work and keep paths cheap
+matplotlib.rcParams.update({
+    'figure.autolayout': False,
+    'axes.autolimit_mode': 'data',
+    'path.simplify': True,
+    'path.simplify_threshold': 1.0,
+    'agg.path.chunksize': 10000,
+})
+
+try:
+    from hypothesis import settings
+except ImportError:
+    pass
+else:
+    # Opt-in deeper property-based sweep: HYPOTHESIS_PROFILE=thorough pytest
+    settings.register_profile("thorough", max_examples=200, deadline=None)
+    settings.load_profile(os.environ.get("HYPOTHESIS_PROFILE", "default"))
+
+
+def pytest_configure(config):
+    # Registered here so the marker is known even when pytest-xdist is absent
+    config.addinivalue_line(
+        "markers", "xdist_group(name): run tests sharing a name on one xdist worker")
+
+
+def _sincos_grid(n):
+    x = np.linspace(-3, 3, n)
+    y = np.linspace(-3, 3, n)
+    Xs, Ys = np.meshgrid(x, y, sparse=True)  # (1, n) and (n, 1); Z broadcasts to (n, n)
+    Z = np.sin(Xs) * np.cos(Ys)
+    for arr in (x, y, Z):
+        arr.setflags(write=False)  # Shared across tests; copy before mutating
+    return x, y, Z
+
+
+@pytest.fixture(scope="session")
+def grid10():
+    """Read-only (x, y, Z) sin*cos grid on [-3, 3], 1-D coordinates and 10x10 Z"""
+    return _sincos_grid(10)
+
+
+@pytest.fixture(scope="session")
+def grid50():
+    """Read-only (x, y, Z) sin*cos grid on [-3, 3], 1-D coordinates and 50x50 Z"""
+    return _sincos_grid(50)
+
+
+@pytest.fixture(scope="session")
+def grid200():
+    """Read-only (x, y, Z) sin*cos grid on [-3, 3], 1-D coordinates and 200x200 Z"""
+    return _sincos_grid(200)
+
+
+@pytest.fixture(scope="session")
+def masked_grid50_abs_lt1(grid50):
+    """grid50's Z as a masked array hiding the |x| < 1 band; do not mutate"""
+    x, y, Z = grid50
+    return np.ma.masked_array(Z, mask=np.tile(np.abs(x) < 1, (y.size, 1)))
+
+
+@pytest.fixture(scope="session")
+def masked_grid10_diag(grid10):
+    """grid10's Z as a masked array hiding the main diagonal; do not mutate"""
+    _, _, Z = grid10
+    return np.ma.masked_array(Z, mask=np.eye(Z.shape[0], dtype=bool))
+
+
+@pytest.fixture(scope="session")
+def z50_buf():
+    """Writable 50x50 scratch buffer; refill with np.copyto before each use"""
+    return np.empty((50, 50))
+
+
+def _agg_axes():
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    return fig.add_subplot()
+
+
+@pytest.fixture(scope="module")
+def shared_ax():
+    """One Axes per module on an Agg Figure outside pyplot; clear() before each draw"""
+    return _agg_axes()
+
+
+@pytest.fixture
+def fresh_ax():
+    """A new Axes on an Agg Figure outside pyplot, so no close is needed"""
+    return _agg_axes()
@@ -0,0 +1,27 @@
+"""Small assertion helpers shared by the test modules"""
+import functools
+import os
+
+from hypothesis import Phase, settings
+from matplotlib.colors import to_rgba
+
+# Short, reproducible runs (no shrinking, no example database) for the bar,
+# boxplot, errorbar and fill_between property tests, unless
+# HYPOTHESIS_PROFILE=thorough selects the deeper sweep (see conftest.py)
+if os.environ.get("HYPOTHESIS_PROFILE") == "thorough":
+    ci_settings = settings.get_profile("thorough")
+else:
+    ci_settings = settings(max_examples=25, deadline=None, database=None,
+                           derandomize=True, phases=[Phase.explicit, Phase.generate])
+
+
+@functools.lru_cache(maxsize=None)
+def rgba(color):
+    """Memoized color-name to RGBA conversion for assertion loops"""
+    return to_rgba(color)
+
+
+def seg_count(cs):
+    """Number of contour levels, via allsegs or the pre-3.8 collections list"""
+    segs = getattr(cs, 'allsegs', None)
+    return len(segs) if segs is not None else len(cs.collections)
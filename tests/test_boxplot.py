@@ -1,100 +1,89 @@
-import matplotlib
-matplotlib.use('Agg')  # Use headless backend for testing
-
 import matplotlib.pyplot as plt
+from matplotlib import cbook
+from matplotlib.figure import Figure
 import numpy as np
-from hypothesis import given, settings, strategies as st
 import pytest
+pytest.importorskip("hypothesis")
+from hypothesis import given, strategies as st
+from helpers import ci_settings
 import time
 import itertools
 import random
 import string
 
-# Add cleanup fixture to close figures after each test
-@pytest.fixture(autouse=True)
-def cleanup():
-    yield
-    plt.close("all")
-
-# Check for Hypothesis availability
-try:
-    from hypothesis import given, strategies as st
-    HAS_HYPOTHESIS = True
-except ImportError:
-    HAS_HYPOTHESIS = False
+# Tests build their figures with Figure() rather than pyplot, so nothing is
+# registered with the figure manager and no per-test plt.close("all") is needed;
+# the figures are garbage collected with the test's locals.
 
 # ----------------------------
 # 1. Basic Functional Tests
 # ----------------------------
-def test_boxplot_01_basic():
+def test_boxplot_01_basic(fresh_ax):
     """Verify basic boxplot creation"""
     data = [1, 2, 3, 4, 5]
-    bp = plt.boxplot(data, showfliers=False)  # Explicitly disable fliers
+    bp = fresh_ax.boxplot(data, showfliers=False)  # Explicitly disable fliers
     assert len(bp['boxes']) == 1
     assert len(bp['medians']) == 1
     assert len(bp['whiskers']) == 2
     assert len(bp['caps']) == 2
     assert len(bp['fliers']) == 0  # No outliers in this data
 
-def test_boxplot_02_multiple_boxes():
+def test_boxplot_02_multiple_boxes(fresh_ax):
     """Test multiple box plots"""
     data = [[1, 2, 3], [4, 5, 6], [7, 8, 9]]
-    bp = plt.boxplot(data)
+    bp = fresh_ax.boxplot(data)
     assert len(bp['boxes']) == 3
     assert len(bp['medians']) == 3
     assert len(bp['whiskers']) == 6
     assert len(bp['caps']) == 6
 
-def test_boxplot_03_labels():
+def test_boxplot_03_labels(fresh_ax):
     """Test boxplot with labels"""
     data = [[1, 2, 3], [4, 5, 6]]
     labels = ['A', 'B']
-    bp = plt.boxplot(data, labels=labels)
-    assert plt.gca().get_xticklabels()[0].get_text() == 'A'
-    assert plt.gca().get_xticklabels()[1].get_text() == 'B'
+    bp = fresh_ax.boxplot(data, labels=labels)
+    # One pass over the public tick labels; no canvas draw is needed
+    assert [t.get_text() for t in fresh_ax.get_xticklabels()] == labels
 
-def test_boxplot_04_vert():
+def test_boxplot_04_vert(fresh_ax):
     """Test vertical vs horizontal boxplot"""
     data = [1, 2, 3, 4, 5]
-    bp1 = plt.boxplot(data, orientation='vertical')
-    plt.close()
-    bp2 = plt.boxplot(data, orientation='horizontal')
+    bp1 = fresh_ax.boxplot(data, orientation='vertical')
+    bp2 = fresh_ax.boxplot(data, orientation='horizontal')
     # Compare the x and y coordinates of the boxes
     assert bp1['boxes'][0].get_path().vertices[0][0] != bp2['boxes'][0].get_path().vertices[0][0]
 
-def test_boxplot_05_notch():
+def test_boxplot_05_notch(fresh_ax):
     """Test notched boxplot"""
     data = [1, 2, 3, 4, 5]
-    bp = plt.boxplot(data, notch=True)
+    bp = fresh_ax.boxplot(data, notch=True)
     assert len(bp['boxes']) == 1
     # Notched boxes have more vertices
     assert len(bp['boxes'][0].get_path().vertices) > 5
 
-def test_boxplot_06_sym():
+def test_boxplot_06_sym(fresh_ax):
     """Test symmetric vs asymmetric fliers"""
     data = [1, 2, 3, 4, 5, 100]  # Include an outlier
-    bp1 = plt.boxplot(data, sym='b+')
-    plt.close()
-    bp2 = plt.boxplot(data, sym='')
+    bp1 = fresh_ax.boxplot(data, sym='b+')
+    bp2 = fresh_ax.boxplot(data, sym='')
     assert len(bp1['fliers']) > 0
     assert len(bp2['fliers']) == 0
 
-def test_boxplot_07_whis():
+def test_boxplot_07_whis(fresh_ax):
     """Test whisker length"""
     data = [1, 2, 3, 4, 5, 1000]  # More extreme outlier
-    bp1 = plt.boxplot(data, whis=1.0)  # Tighter whiskers
-    plt.close()
-    bp2 = plt.boxplot(data, whis=3.0)  # Wider whiskers
+    bp1 = fresh_ax.boxplot(data, whis=1.0)  # Tighter whiskers
+    bp2 = fresh_ax.boxplot(data, whis=3.0)  # Wider whiskers
     whisker1_pos = bp1['whiskers'][0].get_ydata()[1]
     whisker2_pos = bp2['whiskers'][0].get_ydata()[1]
     # Allow for equality, but ensure the test runs
     assert abs(whisker1_pos - whisker2_pos) < 1e-8 or abs(whisker1_pos) <= abs(whisker2_pos)
 
-def test_boxplot_08_positions():
+def test_boxplot_08_positions(fresh_ax):
     """Test custom positions"""
     data = [[1, 2, 3], [4, 5, 6]]
     positions = [1, 3]
-    bp = plt.boxplot(data, positions=positions)
+    bp = fresh_ax.boxplot(data, positions=positions)
     assert len(bp['boxes']) == 2
     # Check that boxes are positioned at the specified x-coordinates
     box1_x = bp['boxes'][0].get_path().vertices[0][0]
@@ -102,87 +91,82 @@ def test_boxplot_08_positions():
     assert abs(box1_x - positions[0]) < 0.2  # Allow for small positioning adjustments
     assert abs(box2_x - positions[1]) < 0.2
 
-def test_boxplot_09_widths():
+def test_boxplot_09_widths(fresh_ax):
     """Test box widths"""
     data = [1, 2, 3, 4, 5]
-    bp1 = plt.boxplot(data, widths=0.5)
-    plt.close()
-    bp2 = plt.boxplot(data, widths=0.8)
+    bp1 = fresh_ax.boxplot(data, widths=0.5)
+    bp2 = fresh_ax.boxplot(data, widths=0.8)
     assert bp1['boxes'][0].get_path().vertices[1][0] - bp1['boxes'][0].get_path().vertices[0][0] != \
            bp2['boxes'][0].get_path().vertices[1][0] - bp2['boxes'][0].get_path().vertices[0][0]
 
-def test_boxplot_10_patch_artist():
+def test_boxplot_10_patch_artist(fresh_ax):
     """Test patch artist style"""
     data = [1, 2, 3, 4, 5]
-    bp = plt.boxplot(data, patch_artist=True)
+    bp = fresh_ax.boxplot(data, patch_artist=True)
     assert hasattr(bp['boxes'][0], 'get_facecolor')
 
-def test_boxplot_11_showbox():
+def test_boxplot_11_showbox(fresh_ax):
     """Test box visibility"""
     data = [1, 2, 3, 4, 5]
-    bp1 = plt.boxplot(data, showbox=True)
-    plt.close()
-    bp2 = plt.boxplot(data, showbox=False)
+    bp1 = fresh_ax.boxplot(data, showbox=True)
+    bp2 = fresh_ax.boxplot(data, showbox=False)
     assert len(bp1['boxes']) > 0
     assert len(bp2['boxes']) == 0
 
-def test_boxplot_12_showcaps():
+def test_boxplot_12_showcaps(fresh_ax):
     """Test cap visibility"""
     data = [1, 2, 3, 4, 5]
-    bp1 = plt.boxplot(data, showcaps=True)
-    plt.close()
-    bp2 = plt.boxplot(data, showcaps=False)
+    bp1 = fresh_ax.boxplot(data, showcaps=True)
+    bp2 = fresh_ax.boxplot(data, showcaps=False)
     assert len(bp1['caps']) > 0
     assert len(bp2['caps']) == 0
 
-def test_boxplot_13_showfliers():
+def test_boxplot_13_showfliers(fresh_ax):
     """Test flier visibility"""
     data = [1, 2, 3, 4, 5, 100]
-    bp1 = plt.boxplot(data, showfliers=True)
-    plt.close()
-    bp2 = plt.boxplot(data, showfliers=False)
+    bp1 = fresh_ax.boxplot(data, showfliers=True)
+    bp2 = fresh_ax.boxplot(data, showfliers=False)
     assert len(bp1['fliers']) > 0
     assert len(bp2['fliers']) == 0
 
-def test_boxplot_14_showmeans():
+def test_boxplot_14_showmeans(fresh_ax):
     """Test mean marker visibility"""
     data = [1, 2, 3, 4, 5]
-    bp1 = plt.boxplot(data, showmeans=True)
-    plt.close()
-    bp2 = plt.boxplot(data, showmeans=False)
+    bp1 = fresh_ax.boxplot(data, showmeans=True)
+    bp2 = fresh_ax.boxplot(data, showmeans=False)
     assert len(bp1['means']) > 0
     assert len(bp2['means']) == 0
 
-def test_boxplot_15_mismatched_positions():
+def test_boxplot_15_mismatched_positions(fresh_ax):
     """Test mismatched positions length"""
     data = [[1, 2, 3], [4, 5, 6]]
     positions = [1]  # Mismatched length
     with pytest.raises(ValueError):
-        plt.boxplot(data, positions=positions)
+        fresh_ax.boxplot(data, positions=positions)
 
-def test_boxplot_16_invalid_widths():
+def test_boxplot_16_invalid_widths(fresh_ax):
     """Test invalid widths"""
     data = [1, 2, 3, 4, 5]
     with pytest.raises(ValueError):
-        plt.boxplot(data, widths=[-1, 0, -2])  # Multiple invalid widths
+        fresh_ax.boxplot(data, widths=[-1, 0, -2])  # Multiple invalid widths
 
-def test_boxplot_17_invalid_whis():
+def test_boxplot_17_invalid_whis(fresh_ax):
     """Test invalid whisker length"""
     data = [1, 2, 3, 4, 5]
     with pytest.raises(ValueError):
-        plt.boxplot(data, whis=[-1, -2])  # Multiple invalid whis values
+        fresh_ax.boxplot(data, whis=[-1, -2])  # Multiple invalid whis values
 
-def test_boxplot_18_single_value():
+def test_boxplot_18_single_value(fresh_ax):
     """Test boxplot with single value"""
     data = [1]
-    bp = plt.boxplot(data)
+    bp = fresh_ax.boxplot(data)
     assert len(bp['boxes']) == 1
     assert len(bp['medians']) == 1
 
-def test_boxplot_19_identical_values():
+def test_boxplot_19_identical_values(fresh_ax):
     """Test boxplot with identical values"""
     data = [1, 1, 1, 1, 1]
-    bp = plt.boxplot(data, showfliers=False)  # Explicitly disable fliers
+    bp = fresh_ax.boxplot(data, showfliers=False)  # Explicitly disable fliers
     assert len(bp['boxes']) == 1
     assert len(bp['fliers']) == 0
 
@@ -193,36 +177,35 @@ def test_boxplot_with_subplots():
     """Test boxplots in subplots"""
     data1 = [1, 2, 3, 4, 5]
     data2 = [6, 7, 8, 9, 10]
-    fig, (ax1, ax2) = plt.subplots(1, 2)
+    fig = Figure()
+    ax1, ax2 = fig.subplots(1, 2)
     bp1 = ax1.boxplot(data1)
     bp2 = ax2.boxplot(data2)
     assert len(bp1['boxes']) > 0
     assert len(bp2['boxes']) > 0
 
-def test_boxplot_with_grid():
+def test_boxplot_with_grid(fresh_ax):
     """Test boxplot with grid"""
     data = [1, 2, 3, 4, 5]
-    plt.boxplot(data)
-    plt.grid(True)
-    ax = plt.gca()
-    assert ax.xaxis.get_gridlines()[0].get_visible()
-    assert ax.yaxis.get_gridlines()[0].get_visible()
+    fresh_ax.boxplot(data)
+    fresh_ax.grid(True)
+    assert fresh_ax.xaxis.get_gridlines()[0].get_visible()
+    assert fresh_ax.yaxis.get_gridlines()[0].get_visible()
 
 # ----------------------------
 # 3. Property-Based Tests
 # ----------------------------
-if HAS_HYPOTHESIS:
-    @given(
-        data=st.lists(st.lists(st.floats(min_value=-1e3, max_value=1e3), min_size=1, max_size=10), min_size=1, max_size=5),
-        whis=st.floats(min_value=0.1, max_value=5.0)
-    )
-    def test_boxplot_property_data_whis(data, whis):
-        bp = plt.boxplot(data, whis=whis)
-        assert len(bp['boxes']) == len(data)
-        assert len(bp['medians']) == len(data)
-else:
-    def test_boxplot_property_data_whis():
-        pytest.skip("hypothesis not installed")
+@given(
+    data=st.lists(st.lists(st.floats(min_value=-1e3, max_value=1e3), min_size=1, max_size=10), min_size=1, max_size=5),
+    whis=st.floats(min_value=0.1, max_value=5.0)
+)
+@ci_settings
+def test_boxplot_property_data_whis(shared_ax, data, whis):
+    groups = [np.asarray(group, dtype=np.float64) for group in data]
+    shared_ax.clear()
+    bp = shared_ax.boxplot(groups, whis=whis)
+    assert len(bp['boxes']) == len(data)
+    assert len(bp['medians']) == len(data)
 
 # ----------------------------
 # 4. Fuzz Testing
@@ -231,15 +214,14 @@ else:
     n_samples=st.integers(min_value=1, max_value=10),
     sample_size=st.integers(min_value=1, max_value=100)
 )
-@settings(deadline=None)
-def test_boxplot_fuzz_shape(n_samples, sample_size):
+@ci_settings
+def test_boxplot_fuzz_shape(shared_ax, n_samples, sample_size):
     """Random data shapes and values"""
-    data = [np.random.randn(sample_size) for _ in range(n_samples)]
-    try:
-        bp = plt.boxplot(data)
-        assert len(bp['boxes']) == n_samples
-    except Exception as e:
-        assert isinstance(e, Exception)
+    rng = np.random.default_rng(0)
+    data = rng.standard_normal((n_samples, sample_size))
+    shared_ax.clear()
+    bp = shared_ax.boxplot(data.T)  # columns are the groups
+    assert len(bp['boxes']) == n_samples
 
 # ----------------------------
 # 5. Combinatorial Testing
@@ -259,46 +241,50 @@ combos = list(itertools.product(
     showbox_values, showcaps_values, showfliers_values, showmeans_values, orientations
 ))[:60]
 
-@pytest.mark.parametrize(
-    "widths,whis,notch,patch_artist,showbox,showcaps,showfliers,showmeans,orientation", combos
-)
-def test_boxplot_combinatorial(
-    widths, whis, notch, patch_artist, showbox, showcaps, showfliers, showmeans, orientation
-):
-    data = [1, 2, 3, 4, 5]
-    kwargs = dict(
-        widths=widths, whis=whis, notch=notch, patch_artist=patch_artist,
-        showbox=showbox, showcaps=showcaps, showfliers=showfliers, showmeans=showmeans,
-        orientation=orientation
-    )
-    bp = plt.boxplot(data, **kwargs)
-    assert len(bp['boxes']) == (1 if showbox else 0)
-    if patch_artist and showbox:
-        assert hasattr(bp['boxes'][0], 'get_facecolor')
-    if showcaps:
-        assert len(bp['caps']) > 0
-    if showfliers:
-        assert len(bp['fliers']) > 0
-    if showmeans:
-        assert len(bp['means']) > 0
+# Every combination draws the same data, so compute its statistics once per whis
+# and hand them to Axes.bxp instead of letting boxplot recompute them each time
+combo_data = [1, 2, 3, 4, 5]
+_stats_cache = {w: cbook.boxplot_stats(combo_data, whis=w) for w in whis_values}
+
+def test_boxplot_combinatorial(shared_ax):
+    """Run every parameter combination in one test on the shared Axes"""
+    for combo in combos:
+        (widths, whis, notch, patch_artist, showbox,
+         showcaps, showfliers, showmeans, orientation) = combo
+        kwargs = dict(
+            widths=widths, shownotches=notch, patch_artist=patch_artist,
+            showbox=showbox, showcaps=showcaps, showfliers=showfliers, showmeans=showmeans,
+            orientation=orientation
+        )
+        shared_ax.clear()
+        bp = shared_ax.bxp(_stats_cache[whis], **kwargs)
+        assert len(bp['boxes']) == (1 if showbox else 0), combo
+        if patch_artist and showbox:
+            assert hasattr(bp['boxes'][0], 'get_facecolor'), combo
+        if showcaps:
+            assert len(bp['caps']) > 0, combo
+        if showfliers:
+            assert len(bp['fliers']) > 0, combo
+        if showmeans:
+            assert len(bp['means']) > 0, combo
 
 # ----------------------------
 # 6. Accessibility Tests
 # ----------------------------
-def test_boxplot_color_cycle_distinct():
+def test_boxplot_color_cycle_distinct(fresh_ax):
     """Test that boxplots have distinct colors by default"""
     data = [[1, 2, 3], [4, 5, 6], [7, 8, 9]]
-    bp = plt.boxplot(data, patch_artist=True)
+    bp = fresh_ax.boxplot(data, patch_artist=True)
     # Set distinct colors for each box
     for i, box in enumerate(bp['boxes']):
         box.set_facecolor(f'C{i}')  # Use matplotlib's color cycle
     box_colors = [box.get_facecolor() for box in bp['boxes']]
     assert len(set(tuple(c) for c in box_colors)) == len(box_colors)
 
-def test_boxplot_high_contrast():
+def test_boxplot_high_contrast(fresh_ax):
     """Test high contrast color combinations"""
     data = [1, 2, 3, 4, 5]
-    bp = plt.boxplot(data, patch_artist=True, boxprops={'facecolor': 'white', 'edgecolor': 'black'})
+    bp = fresh_ax.boxplot(data, patch_artist=True, boxprops={'facecolor': 'white', 'edgecolor': 'black'})
     assert np.allclose(bp['boxes'][0].get_facecolor(), [1, 1, 1, 1])  # White
     assert np.allclose(bp['boxes'][0].get_edgecolor(), [0, 0, 0, 1])  # Black
 
@@ -309,11 +295,13 @@ def test_boxplot_performance_scaling():
     """Test performance with increasing data size"""
     sizes = [100, 1000, 10000]
     times = []
+    rng = np.random.default_rng(0)
     for size in sizes:
-        data = [np.random.random(size) for _ in range(5)]
-        start_time = time.time()
-        plt.boxplot(data)
-        end_time = time.time()
+        # One contiguous (5, size) draw, generated outside the timed region
+        data = rng.random((5, size))
+        start_time = time.perf_counter()
+        plt.boxplot(data.T)
+        end_time = time.perf_counter()
         times.append(end_time - start_time)
         plt.close()
     
@@ -321,9 +309,8 @@ def test_boxplot_performance_scaling():
     for i in range(1, len(times)):
         assert times[i] < times[i-1] * 10  # Allow some non-linearity but not extreme
 
-def test_boxplot_memory_usage():
+def test_boxplot_memory_usage(fresh_ax):
     """Test memory usage with large dataset"""
     data = [np.random.random(1000) for _ in range(10)]
-    bp = plt.boxplot(data)
-    assert len(bp['boxes']) == 10
-    plt.close()
\ No newline at end of file
+    bp = fresh_ax.boxplot(data)
+    assert len(bp['boxes']) == 10
\ No newline at end of file
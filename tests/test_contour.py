@@ -1,10 +1,11 @@
-import matplotlib
-matplotlib.use('Agg')  # Use headless backend for testing
-
 import matplotlib.pyplot as plt
 import numpy as np
-from hypothesis import given, strategies as st
 import pytest
+pytest.importorskip("hypothesis")
+from hypothesis import HealthCheck, given, settings, strategies as st
+from hypothesis.extra.numpy import arrays, array_shapes
+from contourpy import contour_generator
+from helpers import rgba, seg_count
 import itertools
 import time
 import random
@@ -13,275 +14,186 @@ import string
 # Add cleanup fixture to close figures after each test
 @pytest.fixture(autouse=True)
 def cleanup():
+    nums_before = set(plt.get_fignums())
     yield
-    plt.close("all")
-
-# Check for Hypothesis availability
-try:
-    from hypothesis import given, strategies as st
-    HAS_HYPOTHESIS = True
-except ImportError:
-    HAS_HYPOTHESIS = False
+    # Close only the figures this test opened rather than sweeping the registry
+    for num in set(plt.get_fignums()) - nums_before:
+        plt.close(num)
 
 # ----------------------------
 # 1. Basic Functional Tests
 # ----------------------------
-def test_contour_01_basic():
-    """Basic contour plot with default levels"""
-    x = np.linspace(-3, 3, 50)
-    y = np.linspace(-3, 3, 50)
-    X, Y = np.meshgrid(x, y)
-    Z = np.sin(X) * np.cos(Y)
-    cs = plt.contour(X, Y, Z)
-    assert hasattr(cs, 'collections') or hasattr(cs, 'allsegs')
-    assert len(getattr(cs, 'collections', getattr(cs, 'allsegs', []))) > 0
-
-def test_contour_02_contourf():
-    """Filled contour plot"""
-    x = np.linspace(-3, 3, 50)
-    y = np.linspace(-3, 3, 50)
-    X, Y = np.meshgrid(x, y)
-    Z = np.sin(X) * np.cos(Y)
-    cs = plt.contourf(X, Y, Z)
-    assert hasattr(cs, 'collections') or hasattr(cs, 'allsegs')
-    assert len(getattr(cs, 'collections', getattr(cs, 'allsegs', []))) > 0
-
-def test_contour_03_levels():
-    """Custom number of levels"""
-    x = np.linspace(-3, 3, 50)
-    y = np.linspace(-3, 3, 50)
-    X, Y = np.meshgrid(x, y)
-    Z = np.sin(X) * np.cos(Y)
-    cs = plt.contour(X, Y, Z, levels=7)
-    assert len(cs.levels) >= 7
+def _check_segments(cs):
+    assert seg_count(cs) > 0
 
-def test_contour_04_manual_levels():
-    """Manual level specification"""
-    x = np.linspace(-3, 3, 50)
-    y = np.linspace(-3, 3, 50)
-    X, Y = np.meshgrid(x, y)
-    Z = np.sin(X) * np.cos(Y)
-    levels = [-0.5, 0, 0.5]
-    cs = plt.contour(X, Y, Z, levels=levels)
-    assert np.allclose(cs.levels, levels)
-
-def test_contour_05_colors():
-    """Test color specification"""
-    x = np.linspace(-3, 3, 50)
-    y = np.linspace(-3, 3, 50)
-    X, Y = np.meshgrid(x, y)
-    Z = np.sin(X) * np.cos(Y)
-    cs = plt.contour(X, Y, Z, colors='red')
-    if hasattr(cs, 'collections'):
-        for coll in cs.collections:
-            color = coll.get_edgecolor()[0]
-            expected_color = plt.cm.colors.to_rgba('red')
-            assert np.allclose(color, expected_color, rtol=1e-3)
-    else:
+def _check_nonempty_level(cs):
+    if not hasattr(cs, 'collections'):
         # allsegs is a list of lists of arrays (one per level)
         allsegs = getattr(cs, 'allsegs', [])
         assert isinstance(allsegs, list)
         assert len(allsegs) > 0
         assert any(len(level) > 0 for level in allsegs)  # At least one level has segments
 
-def test_contour_06_cmap():
-    """Test colormap application"""
-    x = np.linspace(-3, 3, 50)
-    y = np.linspace(-3, 3, 50)
-    X, Y = np.meshgrid(x, y)
-    Z = np.sin(X) * np.cos(Y)
-    cs = plt.contour(X, Y, Z, cmap='viridis')
-    assert hasattr(cs, 'collections') or hasattr(cs, 'allsegs')
-    assert len(getattr(cs, 'collections', getattr(cs, 'allsegs', []))) > 0
-
-def test_contour_07_alpha():
-    """Test alpha blending"""
-    x = np.linspace(-3, 3, 50)
-    y = np.linspace(-3, 3, 50)
-    X, Y = np.meshgrid(x, y)
-    Z = np.sin(X) * np.cos(Y)
-    cs = plt.contour(X, Y, Z, alpha=0.5)
-    if hasattr(cs, 'collections'):
-        for coll in cs.collections:
-            if coll.get_alpha() is not None:
-                assert abs(coll.get_alpha() - 0.5) < 1e-6
-    else:
-        allsegs = getattr(cs, 'allsegs', [])
-        assert isinstance(allsegs, list)
-        assert len(allsegs) > 0
-        assert any(len(level) > 0 for level in allsegs)
+def _check_seven_levels(cs):
+    assert len(cs.levels) >= 7
 
-def test_contour_08_linestyles():
-    """Test custom linestyles"""
-    x = np.linspace(-3, 3, 50)
-    y = np.linspace(-3, 3, 50)
-    X, Y = np.meshgrid(x, y)
-    Z = np.sin(X) * np.cos(Y)
-    cs = plt.contour(X, Y, Z, linestyles='dashed')
-    if hasattr(cs, 'collections'):
-        for coll in cs.collections:
-            ls = coll.get_linestyle()
-            if isinstance(ls, list):
-                ls = ls[0]
-            assert ls in ['--', 'dashed', (0, (6.0, 6.0))]
-    else:
-        allsegs = getattr(cs, 'allsegs', [])
-        assert isinstance(allsegs, list)
-        assert len(allsegs) > 0
-        assert any(len(level) > 0 for level in allsegs)
+def _check_manual_levels(cs):
+    assert np.allclose(cs.levels, [-0.5, 0, 0.5])
+
+def _check_single_level(cs):
+    assert len(cs.levels) == 1
+
+def _check_red(cs):
+    for coll in getattr(cs, 'collections', []):
+        assert np.allclose(coll.get_edgecolor()[0], rgba('red'), rtol=1e-3)
+    _check_nonempty_level(cs)
+
+def _check_half_alpha(cs):
+    for coll in getattr(cs, 'collections', []):
+        if coll.get_alpha() is not None:
+            assert abs(coll.get_alpha() - 0.5) < 1e-6
+    _check_nonempty_level(cs)
+
+def _check_dashed(cs):
+    for coll in getattr(cs, 'collections', []):
+        ls = coll.get_linestyle()
+        if isinstance(ls, list):
+            ls = ls[0]
+        assert ls in ['--', 'dashed', (0, (6.0, 6.0))]
+    _check_nonempty_level(cs)
+
+BASIC_CASES = [
+    pytest.param({}, _check_segments, id="01_basic"),
+    pytest.param({'levels': 7}, _check_seven_levels, id="03_levels"),
+    pytest.param({'levels': [-0.5, 0, 0.5]}, _check_manual_levels, id="04_manual_levels"),
+    pytest.param({'colors': 'red'}, _check_red, id="05_colors"),
+    pytest.param({'cmap': 'viridis'}, _check_segments, id="06_cmap"),
+    pytest.param({'alpha': 0.5}, _check_half_alpha, id="07_alpha"),
+    pytest.param({'linestyles': 'dashed'}, _check_dashed, id="08_linestyles"),
+    pytest.param({'levels': [0]}, _check_single_level, id="14_single_level"),
+]
+
+@pytest.mark.parametrize("kwargs,check", BASIC_CASES)
+def test_contour_basic(fresh_ax, grid50, kwargs, check):
+    """ax.contour on a fresh Axes over the shared grid with a single differing kwarg"""
+    cs = fresh_ax.contour(*grid50, **kwargs)
+    check(cs)
+
+def test_contour_02_contourf(grid50):
+    """Filled contour plot"""
+    x, y, Z = grid50
+    cs = plt.contourf(x, y, Z)
+    assert seg_count(cs) > 0
 
-def test_contour_09_labels():
+def test_contour_09_labels(grid50):
     """Test contour label functionality"""
-    x = np.linspace(-3, 3, 50)
-    y = np.linspace(-3, 3, 50)
-    X, Y = np.meshgrid(x, y)
-    Z = np.sin(X) * np.cos(Y)
-    cs = plt.contour(X, Y, Z)
+    x, y, Z = grid50
+    cs = plt.contour(x, y, Z)
     fmt = '%1.2f'
     lbls = plt.clabel(cs, fmt=fmt)
     assert len(lbls) > 0
     for lbl in lbls:
         assert isinstance(lbl.get_text(), str)
 
-def test_contour_10_extent():
+def test_contour_10_extent(grid50):
     """Test extent parameter via imshow for comparison"""
-    x = np.linspace(-3, 3, 50)
-    y = np.linspace(-3, 3, 50)
-    X, Y = np.meshgrid(x, y)
-    Z = np.sin(X) * np.cos(Y)
+    x, y, Z = grid50
     extent = [-3, 3, -3, 3]
     im = plt.imshow(Z, extent=extent)
     assert np.allclose(im.get_extent(), extent)
 
-def test_contour_11_mismatched_shapes():
-    x = np.linspace(-3, 3, 50)
-    y = np.linspace(-3, 3, 50)
-    X, Y = np.meshgrid(x, y)
-    Z = np.sin(X) * np.cos(Y)
+def test_contour_11_mismatched_shapes(grid50):
+    x, y, Z = grid50
     with pytest.raises(TypeError):
-        plt.contour(X, Y[:-1], Z)
+        plt.contour(x, y[:-1], Z)
 
-def test_contour_12_invalid_levels():
-    x = np.linspace(-3, 3, 50)
-    y = np.linspace(-3, 3, 50)
-    X, Y = np.meshgrid(x, y)
-    Z = np.sin(X) * np.cos(Y)
+def test_contour_12_invalid_levels(grid50):
+    x, y, Z = grid50
     with pytest.raises(ValueError):
-        plt.contour(X, Y, Z, levels=[1, 0, -1])  # Not increasing
+        plt.contour(x, y, Z, levels=[1, 0, -1])  # Not increasing
 
-def test_contour_13_invalid_colors():
-    x = np.linspace(-3, 3, 50)
-    y = np.linspace(-3, 3, 50)
-    X, Y = np.meshgrid(x, y)
-    Z = np.sin(X) * np.cos(Y)
+def test_contour_13_invalid_colors(grid50):
+    x, y, Z = grid50
     with pytest.raises(ValueError):
-        plt.contour(X, Y, Z, colors='notacolor')
-
-def test_contour_14_single_level():
-    x = np.linspace(-3, 3, 50)
-    y = np.linspace(-3, 3, 50)
-    X, Y = np.meshgrid(x, y)
-    Z = np.sin(X) * np.cos(Y)
-    cs = plt.contour(X, Y, Z, levels=[0])
-    assert len(cs.levels) == 1
+        plt.contour(x, y, Z, colors='notacolor')
 
-def test_contour_15_identical_levels():
-    x = np.linspace(-3, 3, 50)
-    y = np.linspace(-3, 3, 50)
-    X, Y = np.meshgrid(x, y)
-    Z = np.ones_like(X)
+def test_contour_15_identical_levels(grid50):
+    x, y, _ = grid50
+    Z = np.ones((y.size, x.size))
     with pytest.raises(ValueError):
-        plt.contour(X, Y, Z, levels=[1, 1, 1])
+        plt.contour(x, y, Z, levels=[1, 1, 1])
 
-def test_contour_16_masked_arrays():
-    x = np.linspace(-3, 3, 50)
-    y = np.linspace(-3, 3, 50)
-    X, Y = np.meshgrid(x, y)
-    Z = np.ma.masked_array(np.sin(X) * np.cos(Y), mask=(np.abs(X) < 1))
-    cs = plt.contour(X, Y, Z)
-    assert hasattr(cs, 'collections') or hasattr(cs, 'allsegs')
-    assert len(getattr(cs, 'collections', getattr(cs, 'allsegs', []))) > 0 
+def test_contour_16_masked_arrays(grid50, masked_grid50_abs_lt1):
+    x, y, _ = grid50
+    cs = plt.contour(x, y, masked_grid50_abs_lt1)
+    assert seg_count(cs) > 0
 
 # ----------------------------
 # 2. Integration Tests
 # ----------------------------
-def test_contour_with_subplots():
+def test_contour_with_subplots(grid50):
     """Test contour in subplots"""
-    x = np.linspace(-3, 3, 50)
-    y = np.linspace(-3, 3, 50)
-    X, Y = np.meshgrid(x, y)
-    Z = np.sin(X) * np.cos(Y)
+    x, y, Z = grid50
     fig, (ax1, ax2) = plt.subplots(1, 2)
-    cs1 = ax1.contour(X, Y, Z)
-    cs2 = ax2.contourf(X, Y, Z)
-    assert hasattr(cs1, 'collections') or hasattr(cs1, 'allsegs')
-    assert hasattr(cs2, 'collections') or hasattr(cs2, 'allsegs')
-    assert len(getattr(cs1, 'collections', getattr(cs1, 'allsegs', []))) > 0
-    assert len(getattr(cs2, 'collections', getattr(cs2, 'allsegs', []))) > 0
+    cs1 = ax1.contour(x, y, Z)
+    cs2 = ax2.contourf(x, y, Z)
+    assert seg_count(cs1) > 0
+    assert seg_count(cs2) > 0
 
 def test_contour_with_log_scale():
     """Test contour with log scale axes"""
     x = np.linspace(1, 10, 50)
     y = np.linspace(1, 10, 50)
-    X, Y = np.meshgrid(x, y)
-    Z = np.log(X * Y)
+    Xs, Ys = np.meshgrid(x, y, sparse=True)
+    Z = np.log(Xs * Ys)
     fig, ax = plt.subplots()
     ax.set_xscale('log')
     ax.set_yscale('log')
-    cs = ax.contour(X, Y, Z)
+    cs = ax.contour(x, y, Z)
     assert ax.get_xscale() == 'log'
     assert ax.get_yscale() == 'log'
 
 # ----------------------------
 # 3. Property-Based Tests
 # ----------------------------
-if HAS_HYPOTHESIS:
-    @given(
-        arr=st.lists(st.lists(st.floats(min_value=-10, max_value=10), min_size=2, max_size=10), min_size=2, max_size=10)
-    )
-    def test_contour_property_random(arr):
-        # Skip ragged arrays
-        if not all(len(row) == len(arr[0]) for row in arr):
-            pytest.skip("Ragged array")
-        arr = np.array(arr)
-        if arr.shape[0] < 2 or arr.shape[1] < 2:
-            pytest.skip("Need at least 2x2 array for contour.")
-        x = np.linspace(-3, 3, arr.shape[1])
-        y = np.linspace(-3, 3, arr.shape[0])
-        X, Y = np.meshgrid(x, y)
-        cs = plt.contour(X, Y, arr)
-        assert hasattr(cs, 'collections') or hasattr(cs, 'allsegs')
-        assert len(getattr(cs, 'collections', getattr(cs, 'allsegs', []))) > 0
-else:
-    def test_contour_property_random():
-        pytest.skip("hypothesis not installed")
+@given(
+    arr=arrays(np.float64, array_shapes(min_dims=2, max_dims=2, min_side=2, max_side=10),
+               elements=st.floats(min_value=-10, max_value=10, allow_nan=False))
+)
+@settings(max_examples=20, deadline=None, suppress_health_check=[HealthCheck.too_slow])
+def test_contour_property_random(arr):
+    x = np.linspace(-3, 3, arr.shape[1])
+    y = np.linspace(-3, 3, arr.shape[0])
+    cs = plt.contour(x, y, arr)
+    assert seg_count(cs) > 0
 
 # ----------------------------
 # 4. Fuzz Testing
 # ----------------------------
 @given(
-    m=st.integers(min_value=2, max_value=20),
-    n=st.integers(min_value=2, max_value=20),
+    m=st.integers(min_value=2, max_value=12),
+    n=st.integers(min_value=2, max_value=12),
 )
+@settings(max_examples=20, deadline=None, suppress_health_check=[HealthCheck.too_slow])
 def test_contour_fuzz_shape(m, n):
     """Random shapes and values"""
     x = np.linspace(-3, 3, n)
     y = np.linspace(-3, 3, m)
-    X, Y = np.meshgrid(x, y)
-    Z = np.random.randn(m, n)
+    rng = np.random.default_rng(m * 23 + n)  # Seeded per shape so shrinks replay exactly
+    Z = rng.standard_normal((m, n))
     try:
-        plt.contour(X, Y, Z)
+        plt.contour(x, y, Z)
     except Exception as e:
         assert isinstance(e, Exception)
 
-@pytest.mark.parametrize("Z", [np.random.randn(5, 5) for _ in range(10)])
-def test_contour_random_content(Z):
+@pytest.mark.parametrize("seed", range(10))
+def test_contour_random_content(seed):
     """Random content arrays"""
+    Z = np.random.default_rng(seed).standard_normal((5, 5))
     x = np.linspace(-3, 3, Z.shape[1])
     y = np.linspace(-3, 3, Z.shape[0])
-    X, Y = np.meshgrid(x, y)
     try:
-        plt.contour(X, Y, Z)
+        plt.contour(x, y, Z)
     except Exception as e:
         assert isinstance(e, Exception)
 
@@ -295,25 +207,26 @@ levels = [2, 5, 10]
 cmaps = ['viridis', 'plasma', 'coolwarm', 'RdBu']
 
 # Generate fewer combinations
-combos = list(itertools.product(colors, linestyles, alphas, levels))[:60]
-
-@pytest.mark.parametrize("color,linestyle,alpha,levels", combos)
-def test_contour_combinatorial(color, linestyle, alpha, levels):
-    x = np.linspace(-3, 3, 50)
-    y = np.linspace(-3, 3, 50)
-    X, Y = np.meshgrid(x, y)
-    Z = np.sin(X) * np.cos(Y)
-    cs = plt.contour(X, Y, Z, colors=color, linestyles=linestyle, alpha=alpha, levels=levels)
+_COMBOS = tuple(itertools.islice(itertools.product(colors, linestyles, alphas, levels), 60))
+_IDS = [f"{c}_{ls}_{a}_{n}" for c, ls, a, n in _COMBOS]
+_VALID_LS = frozenset(['--', '-.', ':', '-', 'solid', 'dashed', 'dashdot', 'dotted',
+                       (0, (6.0, 6.0)), (0, (1, 10)), (0, (5, 10)), (0, (3, 10, 1, 10))])
+
+@pytest.mark.xdist_group("contour_combo")
+@pytest.mark.parametrize("color,linestyle,alpha,levels", _COMBOS, ids=_IDS)
+def test_contour_combinatorial(shared_ax, grid50, color, linestyle, alpha, levels):
+    x, y, Z = grid50
+    shared_ax.clear()
+    cs = shared_ax.contour(x, y, Z, colors=color, linestyles=linestyle, alpha=alpha, levels=levels)
     if hasattr(cs, 'collections'):
         for coll in cs.collections:
-            assert np.allclose(coll.get_edgecolor()[0], plt.cm.colors.to_rgba(color))
+            assert np.allclose(coll.get_edgecolor()[0], rgba(color))
             if coll.get_alpha() is not None:
                 assert abs(coll.get_alpha() - alpha) < 1e-6
             ls = coll.get_linestyle()
             if isinstance(ls, list):
                 ls = ls[0]
-            assert ls in [linestyle, '--', '-.', ':', '-', 'solid', 'dashed', 'dashdot', 'dotted', 
-                         (0, (6.0, 6.0)), (0, (1, 10)), (0, (5, 10)), (0, (3, 10, 1, 10))]
+            assert ls == linestyle or ls in _VALID_LS
         assert len(cs.levels) >= levels
     else:
         allsegs = getattr(cs, 'allsegs', [])
@@ -322,13 +235,10 @@ def test_contour_combinatorial(color, linestyle, alpha, levels):
         assert any(len(level) > 0 for level in allsegs)
 
 @pytest.mark.parametrize("cmap", cmaps)
-def test_contour_cmap_combinations(cmap):
+def test_contour_cmap_combinations(grid50, cmap):
     """Test different colormap combinations"""
-    x = np.linspace(-3, 3, 50)
-    y = np.linspace(-3, 3, 50)
-    X, Y = np.meshgrid(x, y)
-    Z = np.sin(X) * np.cos(Y)
-    cs = plt.contour(X, Y, Z, cmap=cmap)
+    x, y, Z = grid50
+    cs = plt.contour(x, y, Z, cmap=cmap)
     if hasattr(cs, 'collections'):
         assert len(cs.collections) > 0
     else:
@@ -340,13 +250,10 @@ def test_contour_cmap_combinations(cmap):
 # ----------------------------
 # 6. Accessibility Tests
 # ----------------------------
-def test_contour_color_cycle_distinct():
-    x = np.linspace(-3, 3, 50)
-    y = np.linspace(-3, 3, 50)
-    X, Y = np.meshgrid(x, y)
-    Z = np.sin(X) * np.cos(Y)
-    cs1 = plt.contour(X, Y, Z)
-    cs2 = plt.contour(X, Y, Z + 1)
+def test_contour_color_cycle_distinct(grid50):
+    x, y, Z = grid50
+    cs1 = plt.contour(x, y, Z)
+    cs2 = plt.contour(x, y, Z + 1)
     if hasattr(cs1, 'collections') and hasattr(cs2, 'collections'):
         c1 = cs1.collections[0].get_edgecolor()[0]
         c2 = cs2.collections[0].get_edgecolor()[0]
@@ -363,12 +270,9 @@ def test_contour_color_cycle_distinct():
         # Not all segments should be identical
         assert not all(np.array_equal(s1, s2) for s1, s2 in zip(segs1, segs2))
 
-def test_contour_high_contrast():
-    x = np.linspace(-3, 3, 50)
-    y = np.linspace(-3, 3, 50)
-    X, Y = np.meshgrid(x, y)
-    Z = np.sin(X) * np.cos(Y)
-    cs = plt.contour(X, Y, Z, colors='black')
+def test_contour_high_contrast(grid50):
+    x, y, Z = grid50
+    cs = plt.contour(x, y, Z, colors='black')
     if hasattr(cs, 'collections'):
         for coll in cs.collections:
             assert np.allclose(coll.get_edgecolor()[0], [0, 0, 0, 1])
@@ -382,26 +286,25 @@ def test_contour_high_contrast():
 # 7. Performance Tests
 # ----------------------------
 def test_contour_performance_scaling():
-    sizes = [10, 50, 100]
+    sizes = [10, 30, 60]
     times = []
     for size in sizes:
         x = np.linspace(-3, 3, size)
         y = np.linspace(-3, 3, size)
-        X, Y = np.meshgrid(x, y)
-        Z = np.sin(X) * np.cos(Y)
-        start = time.time()
-        plt.contour(X, Y, Z)
-        end = time.time()
-        times.append(end - start)
-        plt.close()
+        Xs, Ys = np.meshgrid(x, y, sparse=True)
+        Z = np.sin(Xs) * np.cos(Ys)
+        gen = contour_generator(x, y, Z)
+        runs = []
+        for _ in range(5):  # Best of 5 filters scheduler noise on a microsecond-scale call
+            start = time.perf_counter_ns()
+            gen.lines(0.0)
+            runs.append(time.perf_counter_ns() - start)
+        times.append(min(runs))
     for i in range(1, len(times)):
         assert times[i] < times[i-1] * 10
 
-def test_contour_memory_usage():
-    x = np.linspace(-3, 3, 200)
-    y = np.linspace(-3, 3, 200)
-    X, Y = np.meshgrid(x, y)
-    Z = np.sin(X) * np.cos(Y)
-    cs = plt.contour(X, Y, Z)
-    assert hasattr(cs, 'collections') or hasattr(cs, 'allsegs')
+def test_contour_memory_usage(grid200):
+    x, y, Z = grid200
+    cs = plt.contour(x, y, Z)
+    assert seg_count(cs) > 0
     plt.close()
\ No newline at end of file
@@ -1,197 +1,185 @@
-import matplotlib
-matplotlib.use('Agg')  # Use headless backend for testing
-
-import matplotlib.pyplot as plt
 import numpy as np
-from hypothesis import given, settings, strategies as st
 import pytest
+pytest.importorskip("hypothesis")
+from hypothesis import given, strategies as st
+from hypothesis.extra.numpy import arrays
 import time
 import itertools
 import random
 import string
 from matplotlib.collections import PolyCollection, FillBetweenPolyCollection
-
-# Add cleanup fixture to close figures after each test
-@pytest.fixture(autouse=True)
-def cleanup():
-    yield
-    plt.close("all")
-
-# Check for Hypothesis availability
-try:
-    from hypothesis import given, strategies as st
-    HAS_HYPOTHESIS = True
-except ImportError:
-    HAS_HYPOTHESIS = False
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from helpers import ci_settings, rgba
 
 # ----------------------------
 # 1. Basic Functional Tests
 # ----------------------------
-def test_fill_between_01_basic():
+def test_fill_between_01_basic(fresh_ax):
     """Verify basic fill_between creation"""
     x = [1, 2, 3]
     y1 = [1, 2, 3]
     y2 = [0, 1, 2]
-    poly = plt.fill_between(x, y1, y2)
+    poly = fresh_ax.fill_between(x, y1, y2)
     assert isinstance(poly, PolyCollection)
 
-def test_fill_between_02_single_curve():
+def test_fill_between_02_single_curve(fresh_ax):
     """Test fill between curve and constant"""
     x = [1, 2, 3]
     y = [1, 2, 3]
-    poly = plt.fill_between(x, y)
+    poly = fresh_ax.fill_between(x, y)
     assert isinstance(poly, PolyCollection)
 
-def test_fill_between_03_where():
+def test_fill_between_03_where(fresh_ax):
     """Test where parameter for conditional filling"""
     x = [1, 2, 3, 4]
     y1 = [1, 2, 3, 4]
     y2 = [0, 1, 2, 3]
     where = [True, False, True, False]
-    poly = plt.fill_between(x, y1, y2, where=where)
+    poly = fresh_ax.fill_between(x, y1, y2, where=where)
     assert isinstance(poly, PolyCollection)
 
-def test_fill_between_04_interpolate():
+def test_fill_between_04_interpolate(fresh_ax):
     """Test interpolate parameter"""
     x = [1, 2, 3]
     y1 = [1, 2, 3]
     y2 = [0, 1, 2]
-    poly = plt.fill_between(x, y1, y2, interpolate=True)
+    poly = fresh_ax.fill_between(x, y1, y2, interpolate=True)
     assert isinstance(poly, PolyCollection)
 
-def test_fill_between_05_step():
+def test_fill_between_05_step(fresh_ax):
     """Test step parameter"""
     x = [1, 2, 3]
     y1 = [1, 2, 3]
     y2 = [0, 1, 2]
-    poly = plt.fill_between(x, y1, y2, step='pre')
+    poly = fresh_ax.fill_between(x, y1, y2, step='pre')
     assert isinstance(poly, PolyCollection)
 
-def test_fill_between_06_color():
+def test_fill_between_06_color(fresh_ax):
     """Test color specification"""
     x = [1, 2, 3]
     y1 = [1, 2, 3]
     y2 = [0, 1, 2]
     color = 'red'
-    poly = plt.fill_between(x, y1, y2, color=color)
+    poly = fresh_ax.fill_between(x, y1, y2, color=color)
     facecolor = poly.get_facecolor()
     # Compare to RGBA tuple
-    assert np.allclose(facecolor[0], plt.matplotlib.colors.to_rgba(color))
+    assert np.allclose(facecolor[0], rgba(color))
 
-def test_fill_between_07_alpha():
+def test_fill_between_07_alpha(fresh_ax):
     """Test transparency"""
     x = [1, 2, 3]
     y1 = [1, 2, 3]
     y2 = [0, 1, 2]
     alpha = 0.5
-    poly = plt.fill_between(x, y1, y2, alpha=alpha)
+    poly = fresh_ax.fill_between(x, y1, y2, alpha=alpha)
     assert poly.get_alpha() == alpha
 
-def test_fill_between_08_hatch():
+def test_fill_between_08_hatch(fresh_ax):
     """Test hatch pattern"""
     x = [1, 2, 3]
     y1 = [1, 2, 3]
     y2 = [0, 1, 2]
     hatch = '/'
-    poly = plt.fill_between(x, y1, y2, hatch=hatch)
+    poly = fresh_ax.fill_between(x, y1, y2, hatch=hatch)
     assert poly.get_hatch() == hatch
 
-def test_fill_between_09_edgecolor():
+def test_fill_between_09_edgecolor(fresh_ax):
     """Test edge color"""
     x = [1, 2, 3]
     y1 = [1, 2, 3]
     y2 = [0, 1, 2]
     edgecolor = 'blue'
-    poly = plt.fill_between(x, y1, y2, edgecolor=edgecolor)
-    edgecolor_rgba = plt.matplotlib.colors.to_rgba(edgecolor)
+    poly = fresh_ax.fill_between(x, y1, y2, edgecolor=edgecolor)
+    edgecolor_rgba = rgba(edgecolor)
     # get_edgecolor returns an array of RGBA
     assert np.allclose(poly.get_edgecolor()[0], edgecolor_rgba)
 
-def test_fill_between_10_linewidth():
+def test_fill_between_10_linewidth(fresh_ax):
     """Test line width"""
     x = [1, 2, 3]
     y1 = [1, 2, 3]
     y2 = [0, 1, 2]
     linewidth = 2
-    poly = plt.fill_between(x, y1, y2, linewidth=linewidth)
+    poly = fresh_ax.fill_between(x, y1, y2, linewidth=linewidth)
     # get_linewidth returns an array
     assert np.allclose(poly.get_linewidth()[0], linewidth)
 
-def test_fill_between_11_antialiased():
+def test_fill_between_11_antialiased(fresh_ax):
     """Test antialiasing"""
     x = [1, 2, 3]
     y1 = [1, 2, 3]
     y2 = [0, 1, 2]
     antialiased = True
-    poly = plt.fill_between(x, y1, y2, antialiased=antialiased)
+    poly = fresh_ax.fill_between(x, y1, y2, antialiased=antialiased)
     # get_antialiased returns an array
     assert poly.get_antialiased()[0] == antialiased
 
-def test_fill_between_12_label():
+def test_fill_between_12_label(fresh_ax):
     """Test legend label"""
     x = [1, 2, 3]
     y1 = [1, 2, 3]
     y2 = [0, 1, 2]
     label = 'test'
-    poly = plt.fill_between(x, y1, y2, label=label)
-    plt.legend()
-    assert plt.gca().legend_.get_texts()[0].get_text() == label
+    poly = fresh_ax.fill_between(x, y1, y2, label=label)
+    fresh_ax.legend()
+    assert fresh_ax.legend_.get_texts()[0].get_text() == label
 
-def test_fill_between_13_zorder():
+def test_fill_between_13_zorder(fresh_ax):
     """Test z-order"""
     x = [1, 2, 3]
     y1 = [1, 2, 3]
     y2 = [0, 1, 2]
     zorder = 3
-    poly = plt.fill_between(x, y1, y2, zorder=zorder)
+    poly = fresh_ax.fill_between(x, y1, y2, zorder=zorder)
     assert abs(poly.get_zorder() - zorder) < 1e-6
 
-def test_fill_between_14_data():
+def test_fill_between_14_data(fresh_ax):
     """Test data parameter"""
     x = [1, 2, 3]
     y1 = [1, 2, 3]
     y2 = [0, 1, 2]
     data = {'x': x, 'y1': y1, 'y2': y2}
-    poly = plt.fill_between('x', 'y1', 'y2', data=data)
+    poly = fresh_ax.fill_between('x', 'y1', 'y2', data=data)
     assert isinstance(poly, PolyCollection)
 
-def test_fill_between_15_mismatched_lengths():
+def test_fill_between_15_mismatched_lengths(fresh_ax):
     """Test mismatched data lengths"""
     x = [1, 2, 3]
     y1 = [1, 2]
     y2 = [0, 1, 2]
     with pytest.raises(ValueError):
-        plt.fill_between(x, y1, y2)
+        fresh_ax.fill_between(x, y1, y2)
 
-def test_fill_between_16_invalid_step():
+def test_fill_between_16_invalid_step(fresh_ax):
     """Test invalid step parameter"""
     x = [1, 2, 3]
     y1 = [1, 2, 3]
     y2 = [0, 1, 2]
     with pytest.raises((ValueError, KeyError)):
-        plt.fill_between(x, y1, y2, step='invalid')
+        fresh_ax.fill_between(x, y1, y2, step='invalid')
 
-def test_fill_between_17_invalid_where():
+def test_fill_between_17_invalid_where(fresh_ax):
     """Test invalid where parameter"""
     x = [1, 2, 3]
     y1 = [1, 2, 3]
     y2 = [0, 1, 2]
     with pytest.raises(ValueError):
-        plt.fill_between(x, y1, y2, where=[True, False])  # Mismatched length
+        fresh_ax.fill_between(x, y1, y2, where=[True, False])  # Mismatched length
 
-def test_fill_between_18_single_point():
+def test_fill_between_18_single_point(fresh_ax):
     """Test fill_between with single point"""
     x = [1]
     y1 = [1]
     y2 = [0]
-    poly = plt.fill_between(x, y1, y2)
+    poly = fresh_ax.fill_between(x, y1, y2)
     assert isinstance(poly, PolyCollection)
 
-def test_fill_between_19_identical_curves():
+def test_fill_between_19_identical_curves(fresh_ax):
     """Test fill_between with identical curves"""
     x = [1, 2, 3]
     y = [1, 2, 3]
-    poly = plt.fill_between(x, y, y)
+    poly = fresh_ax.fill_between(x, y, y)
     assert isinstance(poly, PolyCollection)
 
 # ----------------------------
@@ -202,40 +190,41 @@ def test_fill_between_with_subplots():
     x = [1, 2, 3]
     y1 = [1, 2, 3]
     y2 = [0, 1, 2]
-    fig, (ax1, ax2) = plt.subplots(1, 2)
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax1, ax2 = fig.subplots(1, 2)
     poly1 = ax1.fill_between(x, y1, y2)
     poly2 = ax2.fill_between(x, y1, y2)
     # PolyCollection is added to ax.collections, not ax.patches
     assert any(isinstance(coll, PolyCollection) for coll in ax1.collections)
     assert any(isinstance(coll, PolyCollection) for coll in ax2.collections)
 
-def test_fill_between_with_grid():
+def test_fill_between_with_grid(fresh_ax):
     """Test fill_between with grid"""
     x = [1, 2, 3]
     y1 = [1, 2, 3]
     y2 = [0, 1, 2]
-    plt.fill_between(x, y1, y2)
-    plt.grid(True)
-    ax = plt.gca()
-    assert any(line.get_visible() for line in ax.xaxis.get_gridlines())
-    assert any(line.get_visible() for line in ax.yaxis.get_gridlines())
+    fresh_ax.fill_between(x, y1, y2)
+    fresh_ax.grid(True)
+    assert any(line.get_visible() for line in fresh_ax.xaxis.get_gridlines())
+    assert any(line.get_visible() for line in fresh_ax.yaxis.get_gridlines())
 
 # ----------------------------
 # 3. Property-Based Tests
 # ----------------------------
-if HAS_HYPOTHESIS:
-    @given(
-        x=st.lists(st.floats(min_value=-1e3, max_value=1e3), min_size=1, max_size=10),
-        y1=st.lists(st.floats(min_value=-1e3, max_value=1e3), min_size=1, max_size=10),
-        y2=st.lists(st.floats(min_value=-1e3, max_value=1e3), min_size=1, max_size=10)
-    )
-    def test_fill_between_property_data(x, y1, y2):
-        if len(x) == len(y1) == len(y2):
-            poly = plt.fill_between(x, y1, y2)
-            assert isinstance(poly, PolyCollection)
-else:
-    def test_fill_between_property_data():
-        pytest.skip("hypothesis not installed")
+_COORD = st.floats(min_value=-1e3, max_value=1e3)
+# Draw one length, then x, y1 and y2 as float64 arrays of exactly that length
+_X_Y1_Y2_STRAT = st.integers(min_value=1, max_value=10).flatmap(
+    lambda n: st.tuples(*[arrays(np.float64, n, elements=_COORD)] * 3)
+)
+
+@given(data=_X_Y1_Y2_STRAT)
+@ci_settings
+def test_fill_between_property_data(shared_ax, data):
+    x, y1, y2 = data
+    shared_ax.clear()
+    poly = shared_ax.fill_between(x, y1, y2)
+    assert isinstance(poly, PolyCollection)
 
 # ----------------------------
 # 4. Fuzz Testing
@@ -243,25 +232,28 @@ else:
 @given(
     n_points=st.integers(min_value=1, max_value=100)
 )
-def test_fill_between_fuzz_shape(n_points):
+@ci_settings
+def test_fill_between_fuzz_shape(shared_ax, n_points):
     """Random data shapes and values"""
-    x = np.sort(np.random.randn(n_points))
-    y1 = np.random.randn(n_points)
-    y2 = y1 + np.random.uniform(0, 1, n_points)  # ensure y2 >= y1 sometimes
-    try:
-        poly = plt.fill_between(x, y1, y2)
-        assert poly is not None
-    except Exception as e:
-        assert isinstance(e, Exception)
+    # Seeded from the drawn value so each example replays identically when shrinking
+    rng = np.random.default_rng(n_points)
+    x = np.sort(rng.standard_normal(n_points))
+    y1 = rng.standard_normal(n_points)
+    y2 = y1 + rng.uniform(0, 1, n_points)  # ensure y2 >= y1 sometimes
+    shared_ax.clear()
+    poly = shared_ax.fill_between(x, y1, y2)
+    assert poly is not None
 
 @pytest.mark.parametrize("size", [1, 5, 10])
-def test_fill_between_fuzz_invalid_values(size):
+def test_fill_between_fuzz_invalid_values(shared_ax, size):
     """Random invalid values (NaN, Inf, None) with matching sizes"""
-    x = np.random.choice([np.nan, np.inf, -np.inf, None], size=size)
-    y1 = np.random.choice([np.nan, np.inf, -np.inf, None], size=size)
-    y2 = np.random.choice([np.nan, np.inf, -np.inf, None], size=size)
+    rng = np.random.default_rng(size)
+    x = rng.choice([np.nan, np.inf, -np.inf, None], size=size)
+    y1 = rng.choice([np.nan, np.inf, -np.inf, None], size=size)
+    y2 = rng.choice([np.nan, np.inf, -np.inf, None], size=size)
+    shared_ax.clear()
     try:
-        plt.fill_between(x, y1, y2)
+        shared_ax.fill_between(x, y1, y2)
     except Exception as e:
         assert isinstance(e, (ValueError, TypeError))
 
@@ -278,90 +270,79 @@ antialiased_values = [True, False]
 zorder_values = [1, 2, 3]
 labels_values = [None, 'A']
 
-combos = list(itertools.product(
+combos = list(itertools.islice(itertools.product(
     colors_values, hatches_values, steps_values, alphas_values,
     edgecolors_values, linewidths_values, antialiased_values, zorder_values, labels_values
-))[:60]
+), 60))
 
-@pytest.mark.parametrize(
-    "color,hatch,step,alpha,edgecolor,linewidth,antialiased,zorder,label", combos
-)
-def test_fill_between_combinatorial(
-    color, hatch, step, alpha, edgecolor, linewidth, antialiased, zorder, label
-):
+def test_fill_between_combinatorial(shared_ax):
+    """Run every parameter combination in one test on the shared Axes"""
     x = [1, 2, 3]
     y1 = [1, 2, 3]
     y2 = [0, 1, 2]
-    kwargs = dict(
-        color=color, hatch=hatch, step=step, alpha=alpha,
-        edgecolor=edgecolor, linewidth=linewidth, antialiased=antialiased, zorder=zorder
-    )
-    if label is not None:
-        kwargs['label'] = label
-    poly = plt.fill_between(x, y1, y2, **kwargs)
-    # get_facecolor returns an array of RGBA
-    expected_rgba = np.array(list(plt.matplotlib.colors.to_rgba(color)[:3]) + [alpha])
-    assert np.allclose(poly.get_facecolor()[0], expected_rgba)
-    expected_edge_rgba = np.array(list(plt.matplotlib.colors.to_rgba(edgecolor)[:3]) + [alpha])
-    assert np.allclose(poly.get_edgecolor()[0], expected_edge_rgba)
-    assert poly.get_hatch() == hatch
-    assert np.allclose(poly.get_linewidth()[0], linewidth)
-    assert poly.get_antialiased()[0] == antialiased
-    assert abs(poly.get_zorder() - zorder) < 1e-6
-    if label is not None:
-        plt.legend()
-        legend_texts = plt.gca().legend_.get_texts()
-        assert any(label == t.get_text() for t in legend_texts)
+    for combo in combos:
+        color, hatch, step, alpha, edgecolor, linewidth, antialiased, zorder, label = combo
+        kwargs = dict(
+            color=color, hatch=hatch, step=step, alpha=alpha,
+            edgecolor=edgecolor, linewidth=linewidth, antialiased=antialiased, zorder=zorder
+        )
+        if label is not None:
+            kwargs['label'] = label
+        shared_ax.clear()
+        poly = shared_ax.fill_between(x, y1, y2, **kwargs)
+        # get_facecolor returns an array of RGBA
+        expected_rgba = np.array(list(rgba(color)[:3]) + [alpha])
+        assert np.allclose(poly.get_facecolor()[0], expected_rgba), combo
+        expected_edge_rgba = np.array(list(rgba(edgecolor)[:3]) + [alpha])
+        assert np.allclose(poly.get_edgecolor()[0], expected_edge_rgba), combo
+        assert poly.get_hatch() == hatch, combo
+        assert np.allclose(poly.get_linewidth()[0], linewidth), combo
+        assert poly.get_antialiased()[0] == antialiased, combo
+        assert abs(poly.get_zorder() - zorder) < 1e-6, combo
+        if label is not None:
+            assert poly.get_label() == label, combo
 
 # ----------------------------
 # 6. Accessibility Tests
 # ----------------------------
-def test_fill_between_color_cycle_distinct():
+def test_fill_between_color_cycle_distinct(fresh_ax):
     """Test that fill_between has distinct colors by default"""
     x = [1, 2, 3]
     y1 = [1, 2, 3]
     y2 = [0, 1, 2]
     y3 = [2, 3, 4]
-    poly1 = plt.fill_between(x, y1, y2)
-    poly2 = plt.fill_between(x, y2, y3)
+    poly1 = fresh_ax.fill_between(x, y1, y2)
+    poly2 = fresh_ax.fill_between(x, y2, y3)
     # Compare the first facecolor RGBA
     assert not np.allclose(poly1.get_facecolor()[0], poly2.get_facecolor()[0])
 
-def test_fill_between_high_contrast():
+def test_fill_between_high_contrast(fresh_ax):
     """Test high contrast color combinations"""
     x = [1, 2, 3]
     y1 = [1, 2, 3]
     y2 = [0, 1, 2]
-    poly = plt.fill_between(x, y1, y2, color='white', edgecolor='black')
-    assert np.allclose(poly.get_facecolor()[0], plt.matplotlib.colors.to_rgba('white'))
-    assert np.allclose(poly.get_edgecolor()[0], plt.matplotlib.colors.to_rgba('black'))
+    poly = fresh_ax.fill_between(x, y1, y2, color='white', edgecolor='black')
+    assert np.allclose(poly.get_facecolor()[0], rgba('white'))
+    assert np.allclose(poly.get_edgecolor()[0], rgba('black'))
 
 # ----------------------------
 # 7. Performance Tests
 # ----------------------------
-def test_fill_between_performance_scaling():
-    """Test performance with increasing data size"""
-    sizes = [100, 1000, 10000]
-    times = []
-    for size in sizes:
-        x = np.linspace(0, 1, size)
-        y1 = np.sin(x)
-        y2 = np.cos(x)
-        start_time = time.time()
-        plt.fill_between(x, y1, y2)
-        end_time = time.time()
-        times.append(end_time - start_time)
-        plt.close()
-    
-    # Check that time increases sub-linearly with size
-    for i in range(1, len(times)):
-        assert times[i] < times[i-1] * 10  # Allow some non-linearity but not extreme
-
-def test_fill_between_memory_usage():
+def test_fill_between_performance_scaling(fresh_ax):
+    """A single large fill_between draw finishes within a loose time bound"""
+    size = 2000
+    x = np.linspace(0, 1, size)
+    y1 = np.sin(x)
+    y2 = np.cos(x)
+    start_ns = time.perf_counter_ns()
+    fresh_ax.fill_between(x, y1, y2)
+    elapsed_ns = time.perf_counter_ns() - start_ns
+    assert elapsed_ns < 5e9
+
+def test_fill_between_memory_usage(fresh_ax):
     """Test memory usage with large dataset"""
     x = np.linspace(0, 1, 1000)
     y1 = np.sin(x)
     y2 = np.cos(x)
-    poly = plt.fill_between(x, y1, y2)
-    assert isinstance(poly, PolyCollection)
-    plt.close()
\ No newline at end of file
+    poly = fresh_ax.fill_between(x, y1, y2)
+    assert isinstance(poly, PolyCollection)
\ No newline at end of file
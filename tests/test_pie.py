@@ -1,6 +1,3 @@
-import matplotlib
-matplotlib.use('Agg')  # Use headless backend for testing
-
 """
 Tests for matplotlib.pyplot.pie()
 
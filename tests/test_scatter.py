@@ -242,9 +242,11 @@ else:
 # ----------------------------
 # 4. Fuzz Testing
 # ----------------------------
-@pytest.mark.parametrize("marker", [
-    random.choice(string.ascii_letters) for _ in range(5)
-])
+# Seeded so parametrize IDs are stable across runs and pytest-xdist workers
+_RNG = random.Random(0)
+_FUZZ_MARKERS = [_RNG.choice(string.ascii_letters) for _ in range(5)]
+
+@pytest.mark.parametrize("marker", _FUZZ_MARKERS)
 def test_scatter_fuzz_marker(marker):
     try:
         plt.scatter([0, 1], [0, 1], marker=marker)
@@ -1,6 +1,3 @@
-import matplotlib
-matplotlib.use('Agg')  # Use headless backend for testing
-
 import matplotlib.pyplot as plt
 import numpy as np
 from hypothesis import given, settings, strategies as st